@@ -4,6 +4,7 @@ from math import hypot
 from dataclasses import dataclass
 from enum import Enum
 from itertools import combinations
+from numbers import Integral
 import random
 
 
@@ -31,7 +32,7 @@ class Action(Node):
         self.action = action_func
 
     def execute(self, hero=None):
-        # 执行动作函数（会打印输出）
+        # 执行动作函数（命令写入本回合输出缓冲）
         self.current_status = self.action(hero)
         print(f"Executing action: {self.name}", file=sys.stderr)
         return self.current_status
@@ -182,7 +183,7 @@ def go_home(hero):
     s1 = spiders_in_range[0]
     dist = hypot(hero.x - s1.x, hero.y - s1.y)
     factor = dist / 1000 + 1
-    print(f'MOVE {s1.x + int(s1.vx * factor)} {s1.y + int(s1.vy * factor)}')
+    output.add(hero, 'MOVE', s1.x + int(s1.vx * factor), s1.y + int(s1.vy * factor))
     return NodeStatus.SUCCESS
 
 
@@ -204,7 +205,7 @@ def should_emergency_control(hero):
 def emergency_control(hero):
     spiders_in_range = [s for s in spiders if 400 < hypot(base_x - s.x, base_y - s.y) < 800]
     s = spiders_in_range[0]
-    print(f'SPELL CONTROL {s.id} {hero.x} {hero.y}')
+    output.add(hero, 'CONTROL', s.id, hero.x, hero.y)
     claimed_entities.add(s.id)
     return NodeStatus.SUCCESS
 
@@ -230,7 +231,7 @@ def wind_to_defend(hero):
     spider_ys = [spider.y - spider.vy * 80 + opp_base_y for spider in spiders_in_range]
     target_x = int(np.mean(spider_xs))
     target_y = int(np.mean(spider_ys))
-    print(f'SPELL WIND {target_x} {target_y}')
+    output.add(hero, 'WIND', target_x, target_y)
     return NodeStatus.SUCCESS
 
 
@@ -245,7 +246,7 @@ def should_shield(hero):
 
 
 def shield_to_defend(hero):
-    print(f'SPELL SHIELD {hero.id}')
+    output.add(hero, 'SHIELD', hero.id)
     return NodeStatus.SUCCESS
 
 
@@ -255,17 +256,17 @@ def patrol(hero):
     target_y = base_y + 500 * d
     spiders_in_range = [s for s in spiders if hypot(target_x - s.x, target_y - s.y) < 2500]
     if not spiders_in_range:
-        print(f'MOVE {target_x} {target_y}')
+        output.add(hero, 'MOVE', target_x, target_y)
         return NodeStatus.RUNNING
     if len(spiders_in_range) > 1:
         for s1, s2 in zip(spiders_in_range, spiders_in_range[1:]):
             if hypot(s1.x + s1.vx - s2.x - s2.vx, s1.y + s1.vy - s2.y - s2.vy) < 1600:
-                print(f'MOVE {(s1.x + s2.x) // 2} {(s1.y + s2.y) // 2}')
+                output.add(hero, 'MOVE', (s1.x + s2.x) // 2, (s1.y + s2.y) // 2)
                 return NodeStatus.RUNNING
     spiders_in_range.sort(key=lambda s: (- s.threat_for, hypot(base_x + 3500 * d - s.x, base_y + 3500 * d - s.y)))
     spider = spiders_in_range[0]
 
-    print(f'MOVE {spider.x - spider.vx} {spider.y - spider.vy}')
+    output.add(hero, 'MOVE', spider.x - spider.vx, spider.y - spider.vy)
     return NodeStatus.RUNNING
 
 
@@ -289,7 +290,7 @@ def drag1(hero):
     d = direction()
     target_x = base_x + 7500 * d
     target_y = base_y + 500 * d
-    print(f'SPELL WIND {target_x} {target_y + 500 * d}')
+    output.add(hero, 'WIND', target_x, target_y + 500 * d)
     return NodeStatus.SUCCESS
 
 
@@ -357,7 +358,7 @@ def farm(hero):
         target_y = base_y + 3500 * d
     spiders_in_range = [s for s in spiders if s.threat_for != 2 and (hypot(target_x - s.x, target_y - s.y) < 2800)]
     if not spiders_in_range:
-        print(f'MOVE {target_x} {target_y}')
+        output.add(hero, 'MOVE', target_x, target_y)
         return NodeStatus.RUNNING
 
     spiders_in_range.sort(
@@ -365,10 +366,10 @@ def farm(hero):
     if len(spiders_in_range) > 1:
         for s1, s2 in zip(spiders_in_range, spiders_in_range[1:]):
             if hypot(s1.x + s1.vx - s2.x - s2.vx, s1.y + s1.vy - s2.y - s2.vy) < 1600:
-                print(f'MOVE {(s1.x + s2.x) // 2} {(s1.y + s2.y) // 2}')
+                output.add(hero, 'MOVE', (s1.x + s2.x) // 2, (s1.y + s2.y) // 2)
                 return NodeStatus.RUNNING
     spider = spiders_in_range[0]
-    print(f'MOVE {spider.x - spider.vx} {spider.y - spider.vy}')
+    output.add(hero, 'MOVE', spider.x - spider.vx, spider.y - spider.vy)
     return NodeStatus.RUNNING
 
 
@@ -388,9 +389,10 @@ def gather(hero):
     pairs = list(combinations(spiders_in_range, 2))
     for s1, s2 in pairs:
         if s1.vx - s2.vx < 200 and s2.vx - s1.vx < 200 and 1200 < hypot(s1.x - s2.x, s1.y - s2.y) < 2200:
-            print(f'SPELL CONTROL {s1.id} {s2.x + s2.vx * 2} {s2.y + s2.vy * 2}')
+            output.add(hero, 'CONTROL', s1.id, s2.x + s2.vx * 2, s2.y + s2.vy * 2)
             claimed_entities.add(s1.id)
             return NodeStatus.SUCCESS
+    return NodeStatus.FAILURE
 
 
 def should_drag(hero):
@@ -416,7 +418,7 @@ def drag(hero):
     d = direction()
     target_x = base_x + 4200 * d
     target_y = base_y + 8500 * d
-    print(f'SPELL WIND {target_x} {target_y}')
+    output.add(hero, 'WIND', target_x, target_y)
     return NodeStatus.SUCCESS
 
 
@@ -437,7 +439,7 @@ def control_spider(hero):
         return NodeStatus.FAILURE
     spiders_in_range.sort(key=lambda spider: -spider.health)
     spider = spiders_in_range[0]
-    print(f'SPELL CONTROL {spider.id} {opp_base_x} {opp_base_y}')
+    output.add(hero, 'CONTROL', spider.id, opp_base_x, opp_base_y)
     claimed_entities.add(spider.id)
     return NodeStatus.SUCCESS
 
@@ -467,7 +469,7 @@ def escort(hero):
             target_x += random.randint(-400, 400) * d
             target_y -= random.randint(-200, 200) * d
 
-    print(f'MOVE {target_x} {target_y}')
+    output.add(hero, 'MOVE', target_x, target_y)
     return NodeStatus.SUCCESS
 
 
@@ -490,7 +492,7 @@ def control_opp(hero):
     opp_in_range.sort(key=lambda o: hypot(o.x - nearest_spider.x, o.y - nearest_spider.y))
     opp = opp_in_range[0]
     d = direction()
-    print(f'SPELL CONTROL {opp.id} {opp_base_x - 10000 * d} {opp_base_y - 15000 * d}')
+    output.add(hero, 'CONTROL', opp.id, opp_base_x - 10000 * d, opp_base_y - 15000 * d)
     claimed_entities.add(opp.id)
     return NodeStatus.SUCCESS
 
@@ -515,9 +517,9 @@ def wind_spider(hero):
         s_x = int(np.mean(spider_xs))
         s_y = int(np.mean(spider_ys))
 
-        print(f'SPELL WIND {opp_base_x - s_x + hero.x} {opp_base_y - s_y + hero.y}')
+        output.add(hero, 'WIND', opp_base_x - s_x + hero.x, opp_base_y - s_y + hero.y)
     else:
-        print(f'SPELL WIND {opp_base_x} {opp_base_y}')
+        output.add(hero, 'WIND', opp_base_x, opp_base_y)
     return NodeStatus.SUCCESS
 
 
@@ -540,7 +542,7 @@ def shield_spider(hero):
                                                     hero.y - s.y) < 2200 and s.threat_for == 2 and s.id not in claimed_entities and not s.shield_life]
     spiders_in_range.sort(key=lambda s: (-s.health, hypot(s.x - opp_base_x, s.y - opp_base_y)))
     spider = spiders_in_range[0]
-    print(f'SPELL SHIELD {spider.id}')
+    output.add(hero, 'SHIELD', spider.id)
     claimed_entities.add(spider.id)
     return NodeStatus.SUCCESS
 
@@ -617,6 +619,47 @@ class Hero():
     last_y: int = 0
 
 
+# Output
+COMMAND_ARGS = {'WAIT': 0, 'MOVE': 2, 'WIND': 2, 'SHIELD': 1, 'CONTROL': 3}
+
+
+@dataclass
+class Command():
+    kind: str  # WAIT / MOVE / WIND / SHIELD / CONTROL
+    args: tuple = ()
+
+    def is_valid(self):
+        return COMMAND_ARGS.get(self.kind) == len(self.args) and all(isinstance(a, Integral) for a in self.args)
+
+    def __str__(self):
+        words = [self.kind] if self.kind in ('WAIT', 'MOVE') else ['SPELL', self.kind]
+        return ' '.join(words + [str(a) for a in self.args])
+
+
+class TurnOutput:
+    # 每回合每个英雄恰好一条命令, 最后一次性写出
+    def __init__(self):
+        self.commands = {}
+
+    def add(self, hero, kind, *args):
+        if hero.id in self.commands:
+            print(f"Hero {hero.id} already has {self.commands[hero.id]}, dropping {kind}", file=sys.stderr)
+            return
+        self.commands[hero.id] = Command(kind, args)
+
+    def flush(self, heroes):
+        lines = []
+        for hero in heroes:
+            command = self.commands.get(hero.id)
+            if command is None or not command.is_valid():
+                print(f"Hero {hero.id} has no valid command ({command}), falling back to WAIT", file=sys.stderr)
+                command = Command('WAIT')
+            lines.append(str(command))
+        sys.stdout.write('\n'.join(lines) + '\n')
+        sys.stdout.flush()
+        self.commands.clear()
+
+
 # base_x: The corner of the map representing your base
 base_x, base_y = [int(i) for i in input().split()]
 heroes_per_player = int(input())  # Always 3
@@ -630,6 +673,7 @@ attacker_tree2 = build_attacker_tree()
 
 my_mana_history = []
 claimed_entities = set()
+output = TurnOutput()
 
 # game loop
 while True:
@@ -677,6 +721,8 @@ while True:
         else:
             attacker_tree2.execute(hero)
 
+    output.flush(my_heros)
+
     claimed_entities.clear()
     if my_mana < 20 and have_enough_mana():
         my_mana_history = [-1]
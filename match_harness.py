@@ -0,0 +1,419 @@
+"""Play the submission against itself through the real stdin/stdout protocol.
+
+The bot file is run unmodified as a subprocess, one per player. Each turn the
+harness writes the health/mana/entity lines, waits for one command per hero
+and times the answer the same way the arena does (1000 ms on the first turn,
+50 ms afterwards). Timeouts, crashes and malformed, missing or surplus
+commands are reported as match failures.
+
+Each match keeps two bots busy; running more matches than there are cores
+makes the bots compete for CPU and inflates the measured latencies.
+
+The game model below is deliberately small: it only has to produce
+plausible states so the bot walks through its decision paths. It is not a
+replacement for an in-process simulator.
+
+Usage:
+    python match_harness.py --matches 20 --concurrency 2
+"""
+import argparse
+import asyncio
+import os
+import random
+import re
+import select
+import sys
+import time
+from dataclasses import dataclass, field
+from math import hypot
+
+BOT_PATH = os.path.join(os.path.dirname(os.path.abspath(__file__)), 'Spider-Attack-Promotion-to-Legend-League.py')
+
+MAP_W, MAP_H = 17630, 9000
+BASES = [(0, 0), (MAP_W, MAP_H)]
+HEROES_PER_PLAYER = 3
+MAX_TURNS = 220
+FIRST_TURN_TIMEOUT = 1.0
+TURN_TIMEOUT = 0.05
+EXTRA_OUTPUT_GRACE = 0.002
+
+HERO_SPEED = 800
+HERO_ATTACK_RANGE = 800
+HERO_DAMAGE = 2
+SPIDER_SPEED = 400
+BASE_ATTRACT_RADIUS = 5000
+BASE_DAMAGE_RADIUS = 300
+WIND_RANGE, WIND_PUSH = 1280, 2200
+SPELL_RANGE = 2200
+SPELL_COST = 10
+SHIELD_DURATION = 12
+
+COMMAND_RE = re.compile(
+    r'^(WAIT'
+    r'|MOVE -?\d+ -?\d+'
+    r'|SPELL WIND -?\d+ -?\d+'
+    r'|SPELL SHIELD \d+'
+    r'|SPELL CONTROL \d+ -?\d+ -?\d+)'
+    r'( .*)?$')
+
+
+class MatchFailure(Exception):
+    def __init__(self, player, turn, reason):
+        # player is None when the harness itself failed
+        who = 'harness' if player is None else f'player {player}'
+        super().__init__(f'{who} turn {turn}: {reason}')
+        self.player = player
+        self.turn = turn
+        self.reason = reason
+
+
+# Bot processes
+class BotProcess:
+    def __init__(self, proc):
+        self.proc = proc
+
+    @classmethod
+    async def spawn(cls, path):
+        proc = await asyncio.create_subprocess_exec(
+            sys.executable, path,
+            stdin=asyncio.subprocess.PIPE,
+            stdout=asyncio.subprocess.PIPE,
+            stderr=asyncio.subprocess.DEVNULL)
+        return cls(proc)
+
+    async def send(self, lines):
+        try:
+            self.proc.stdin.write(('\n'.join(lines) + '\n').encode())
+            await self.proc.stdin.drain()
+        except ConnectionError:
+            raise EOFError(f'bot exited with code {await self.proc.wait()}')
+
+    async def pending_line(self):
+        """Return a line the bot writes within EXTRA_OUTPUT_GRACE, if any.
+
+        The grace period only decides which turn a surplus line is blamed
+        on. A line arriving later is caught by `buffered_output` before the
+        next turn is sent. One the bot writes after that point is read as
+        the next turn's first command and surfaces as a surplus line there.
+        """
+        try:
+            raw = await asyncio.wait_for(self.proc.stdout.readline(), EXTRA_OUTPUT_GRACE)
+        except asyncio.TimeoutError:
+            return None
+        return raw.decode().strip() if raw else None
+
+    async def buffered_output(self):
+        """Return a line already written to stdout, if any, without waiting for the bot."""
+        # The data is either in the StreamReader buffer or still in the OS
+        # pipe if the event loop has not polled it since the last turn.
+        pipe = self.proc.stdout._transport.get_extra_info('pipe')
+        if self.proc.stdout._buffer or select.select([pipe], [], [], 0)[0]:
+            return await self.pending_line()
+        return None
+
+    async def turn(self, lines, timeout):
+        """Send one turn and return (commands, elapsed seconds)."""
+        # Output written late in the previous turn would otherwise be read
+        # as this turn's first command.
+        extra = await self.buffered_output()
+        if extra is not None:
+            raise ValueError(f'extra output {extra!r} left over from the previous turn')
+        await self.send(lines)
+        start = time.perf_counter()
+        deadline = start + timeout
+        commands = []
+        while len(commands) < HEROES_PER_PLAYER:
+            remaining = deadline - time.perf_counter()
+            try:
+                raw = await asyncio.wait_for(self.proc.stdout.readline(), max(remaining, 0))
+            except asyncio.TimeoutError:
+                raise TimeoutError(
+                    f'timed out after {len(commands)}/{HEROES_PER_PLAYER} commands ({timeout * 1000:.0f} ms)')
+            if not raw:
+                raise EOFError(f'bot exited with code {await self.proc.wait()}')
+            commands.append(raw.decode().strip())
+        elapsed = time.perf_counter() - start
+        extra = await self.pending_line()
+        if extra is not None:
+            raise ValueError(f'extra output {extra!r} after {HEROES_PER_PLAYER} commands')
+        return commands, elapsed
+
+    async def close(self):
+        if self.proc.returncode is None:
+            self.proc.kill()
+        await self.proc.wait()
+
+
+class BotPool:
+    """Starts bot processes for a batch of matches before the batch begins.
+
+    The bot reads the header once and then loops on turns forever, so a
+    process cannot be handed to a second match. What can be reused is the
+    startup cost: the interpreter launch and numpy import of every bot in a
+    batch happen during `prepare`, while no match is running, so they never
+    compete with a timed turn.
+    """
+
+    def __init__(self, path, warmup):
+        self.path = path
+        self.warmup = warmup
+        self.ready = []
+
+    async def prepare(self, count):
+        while len(self.ready) < count:
+            self.ready.append(await BotProcess.spawn(self.path))
+        # Let the batch finish importing before any turn is timed.
+        await asyncio.sleep(self.warmup)
+
+    def acquire(self):
+        return self.ready.pop()
+
+    async def close(self):
+        while self.ready:
+            await self.ready.pop().close()
+
+
+# Game model
+@dataclass
+class Entity():
+    id: int
+    type: int  # 0=spider, 1/2=hero of player 0/1
+    x: float
+    y: float
+    vx: float = 0
+    vy: float = 0
+    health: int = 0
+    shield_life: int = 0
+    is_controlled: int = 0
+    near_base: int = 0
+
+
+@dataclass
+class Game():
+    rng: random.Random
+    entities: list = field(default_factory=list)
+    health: list = field(default_factory=lambda: [3, 3])
+    mana: list = field(default_factory=lambda: [0, 0])
+    next_id: int = 0
+    turn: int = 0
+
+    def __post_init__(self):
+        for player, (bx, by) in enumerate(BASES):
+            d = 1 if bx == 0 else -1
+            for i in range(HEROES_PER_PLAYER):
+                self.entities.append(Entity(self.next_id, player + 1, bx + d * (1500 + 800 * i), by + d * (1200 - 400 * i)))
+                self.next_id += 1
+
+    def heroes(self, player):
+        return [e for e in self.entities if e.type == player + 1]
+
+    def spiders(self):
+        return [e for e in self.entities if e.type == 0]
+
+    def threat_for(self, spider, player):
+        """Arena encoding seen from `player`: 1=own base, 2=opponent base, 0=neither."""
+        x, y = spider.x, spider.y
+        for _ in range(30):
+            for base, (bx, by) in enumerate(BASES):
+                if hypot(x - bx, y - by) < BASE_ATTRACT_RADIUS:
+                    return 1 if base == player else 2
+            x += spider.vx
+            y += spider.vy
+        return 0
+
+    def view(self, player):
+        lines = [f'{self.health[player]} {self.mana[player]}', f'{self.health[1 - player]} {self.mana[1 - player]}']
+        lines.append(str(len(self.entities)))
+        for e in self.entities:
+            if e.type == 0:
+                kind, threat = 0, self.threat_for(e, player)
+            else:
+                kind, threat = (1 if e.type == player + 1 else 2), -1
+            lines.append(' '.join(str(v) for v in (
+                e.id, kind, int(e.x), int(e.y), e.shield_life, e.is_controlled,
+                e.health if e.type == 0 else -1, int(e.vx) if e.type == 0 else -1,
+                int(e.vy) if e.type == 0 else -1, e.near_base if e.type == 0 else -1, threat)))
+        return lines
+
+    def spawn_spiders(self):
+        if self.turn % 5:
+            return
+        x = self.rng.randint(MAP_W // 2 - 4000, MAP_W // 2 + 4000)
+        angle_vx = self.rng.randint(-300, 300)
+        health = 10 + self.turn // 10
+        for sx, sy, svx, svy in ((x, 0, angle_vx, SPIDER_SPEED - abs(angle_vx) // 2),
+                                 (MAP_W - x, MAP_H, -angle_vx, -(SPIDER_SPEED - abs(angle_vx) // 2))):
+            self.entities.append(Entity(self.next_id, 0, sx, sy, svx, svy, health))
+            self.next_id += 1
+
+    def apply(self, player, hero, command):
+        words = command.split()
+        if words[0] == 'MOVE':
+            tx, ty = int(words[1]), int(words[2])
+            dist = hypot(tx - hero.x, ty - hero.y)
+            step = min(1, HERO_SPEED / dist) if dist else 0
+            hero.x += (tx - hero.x) * step
+            hero.y += (ty - hero.y) * step
+        if words[0] != 'SPELL' or self.mana[player] < SPELL_COST:
+            return
+        self.mana[player] -= SPELL_COST
+        if words[1] == 'WIND':
+            tx, ty = int(words[2]), int(words[3])
+            dist = hypot(tx - hero.x, ty - hero.y) or 1
+            for e in self.entities:
+                if e is not hero and e.type != player + 1 and not e.shield_life and \
+                        hypot(e.x - hero.x, e.y - hero.y) < WIND_RANGE:
+                    e.x += (tx - hero.x) / dist * WIND_PUSH
+                    e.y += (ty - hero.y) / dist * WIND_PUSH
+            return
+        target = next((e for e in self.entities if e.id == int(words[2])), None)
+        if target is None or target.shield_life or hypot(target.x - hero.x, target.y - hero.y) > SPELL_RANGE:
+            return
+        if words[1] == 'SHIELD':
+            target.shield_life = SHIELD_DURATION
+        elif words[1] == 'CONTROL':
+            target.is_controlled = 1
+            if target.type == 0:
+                tx, ty = int(words[3]), int(words[4])
+                dist = hypot(tx - target.x, ty - target.y) or 1
+                target.vx = (tx - target.x) / dist * SPIDER_SPEED
+                target.vy = (ty - target.y) / dist * SPIDER_SPEED
+
+    def step(self, commands):
+        for e in self.entities:
+            e.is_controlled = 0
+            e.shield_life = max(0, e.shield_life - 1)
+        for player in (0, 1):
+            for hero, command in zip(sorted(self.heroes(player), key=lambda h: h.id), commands[player]):
+                self.apply(player, hero, command)
+        for hero in self.heroes(0) + self.heroes(1):
+            for s in self.spiders():
+                if hypot(s.x - hero.x, s.y - hero.y) < HERO_ATTACK_RANGE:
+                    s.health -= HERO_DAMAGE
+                    self.mana[hero.type - 1] += 1
+        survivors = []
+        for e in self.entities:
+            if e.type == 0:
+                if e.health <= 0:
+                    continue
+                for base, (bx, by) in enumerate(BASES):
+                    dist = hypot(bx - e.x, by - e.y)
+                    if dist < BASE_ATTRACT_RADIUS and not e.near_base:
+                        e.near_base = 1
+                        e.vx = (bx - e.x) / dist * SPIDER_SPEED
+                        e.vy = (by - e.y) / dist * SPIDER_SPEED
+                e.x += e.vx
+                e.y += e.vy
+                hit = [base for base, (bx, by) in enumerate(BASES) if hypot(bx - e.x, by - e.y) < BASE_DAMAGE_RADIUS]
+                if hit:
+                    self.health[hit[0]] -= 1
+                    continue
+                if not (-2000 < e.x < MAP_W + 2000 and -2000 < e.y < MAP_H + 2000):
+                    continue
+            else:
+                e.x = min(max(e.x, 0), MAP_W)
+                e.y = min(max(e.y, 0), MAP_H)
+            survivors.append(e)
+        self.entities = survivors
+        self.turn += 1
+        self.spawn_spiders()
+
+    def over(self):
+        return self.turn >= MAX_TURNS or min(self.health) <= 0
+
+
+# Matches
+@dataclass
+class MatchResult():
+    match_id: int
+    turns: int = 0
+    health: list = field(default_factory=list)
+    latencies: list = field(default_factory=list)  # (player, turn, seconds)
+    failure: MatchFailure = None
+
+
+async def play_match(match_id, pool, seed):
+    game = Game(random.Random(seed))
+    result = MatchResult(match_id)
+    bots = [pool.acquire(), pool.acquire()]
+    try:
+        for player, bot in enumerate(bots):
+            bx, by = BASES[player]
+            try:
+                await bot.send([f'{bx} {by}', str(HEROES_PER_PLAYER)])
+            except EOFError as error:
+                raise MatchFailure(player, 0, f'{error} before header')
+        while not game.over():
+            timeout = FIRST_TURN_TIMEOUT if game.turn == 0 else TURN_TIMEOUT
+            answers = await asyncio.gather(
+                *(bot.turn(game.view(player), timeout) for player, bot in enumerate(bots)),
+                return_exceptions=True)
+            commands = []
+            for player, answer in enumerate(answers):
+                if isinstance(answer, BaseException):
+                    raise MatchFailure(player, game.turn, str(answer))
+                lines, elapsed = answer
+                for line in lines:
+                    if not COMMAND_RE.match(line):
+                        raise MatchFailure(player, game.turn, f'malformed command {line!r}')
+                result.latencies.append((player, game.turn, elapsed))
+                commands.append(lines)
+            game.step(commands)
+    except MatchFailure as failure:
+        result.failure = failure
+    except Exception as error:
+        # Keep one broken match from taking down the rest of the run.
+        result.failure = MatchFailure(None, game.turn, f'unexpected error {error!r}')
+    finally:
+        for bot in bots:
+            await bot.close()
+    result.turns = game.turn
+    result.health = list(game.health)
+    return result
+
+
+def percentile(values, q):
+    values = sorted(values)
+    return values[min(len(values) - 1, int(q * len(values)))] if values else 0.0
+
+
+def report(results):
+    failures = [r for r in results if r.failure]
+    first = [t for r in results for _, turn, t in r.latencies if turn == 0]
+    rest = [t for r in results for _, turn, t in r.latencies if turn > 0]
+    print(f'matches: {len(results)}  failures: {len(failures)}')
+    for r in failures:
+        print(f'  match {r.match_id}: {r.failure}')
+    print(f'first turn ms: p50={percentile(first, .5) * 1000:.1f} max={max(first, default=0) * 1000:.1f}')
+    print(f'turn ms: p50={percentile(rest, .5) * 1000:.1f} p95={percentile(rest, .95) * 1000:.1f} '
+          f'p99={percentile(rest, .99) * 1000:.1f} max={max(rest, default=0) * 1000:.1f}')
+    return not failures
+
+
+async def run(args):
+    pool = BotPool(args.bot, args.warmup)
+    results = []
+    try:
+        for first in range(0, args.matches, args.concurrency):
+            batch = range(first, min(first + args.concurrency, args.matches))
+            await pool.prepare(2 * len(batch))
+            results += await asyncio.gather(*(play_match(i, pool, args.seed + i) for i in batch))
+    finally:
+        await pool.close()
+    return results
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument('--bot', default=BOT_PATH)
+    parser.add_argument('--matches', type=int, default=10)
+    parser.add_argument('--concurrency', type=int, default=max(1, (os.cpu_count() or 2) // 2))
+    parser.add_argument('--seed', type=int, default=0)
+    parser.add_argument('--warmup', type=float, default=2.0, help='seconds to let each batch of bots start up')
+    args = parser.parse_args()
+    ok = report(asyncio.run(run(args)))
+    sys.exit(0 if ok else 1)
+
+
+if __name__ == '__main__':
+    main()